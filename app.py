@@ -5,6 +5,8 @@ import re
 import unicodedata
 import sqlite3
 import os
+import string
+import functools
 
 # --- CONFIGURACIÓN DE LA PÁGINA ---
 st.set_page_config(page_title="Mr D Wine - SEO Master Tool", page_icon="🍷", layout="wide")
@@ -210,105 +212,170 @@ def normalizar_region(texto):
         if key in texto_lower: return val
     return str(texto).title()
 
-def generar_seo_title(anio, nombrebase, region, score, es_unico=False):
+def generar_seo_title(anio, nombrebase, region, score, es_unico=False, plantilla='default'):
     """
-    Genera el Title Tag optimizado.
-    Regla: NUNCA incluye el año.
+    Genera el Title Tag optimizado (misma lógica que generar_seo_lote).
+    Regla: NUNCA incluye el año ('anio' y 'es_unico' se ignoran).
     Formato: Sentence case (Solo primera letra mayúscula).
     """
-    nombre_limpio = nombrebase.strip()
-    
-    # --- CAMBIO: ELIMINAMOS EL AÑO ---
-    # Ignoramos la variable 'anio' y 'es_unico'. 
-    # El título base empieza directamente con el nombre del vino.
-    base_title = nombre_limpio
-    
-    # Componentes Opcionales
-    components = []
-    
-    # 1. Region
-    if region:
-        components.append(str(region))
-    
-    # 2. CTA
-    components.append("Best price")
-    
-    # Construcción Iterativa (Límite 60 caracteres)
-    final_title = base_title
-    for comp in components:
-        test_title = f"{final_title} {comp}"
-        if len(test_title) <= 60:
-            final_title = test_title
-        else:
-            continue
-            
-    # Fallback si el nombre solo ya es muy largo
-    if len(final_title) > 60:
-        final_title = final_title[:60]
-        last_space = final_title.rfind(' ')
-        if last_space != -1:
-            final_title = final_title[:last_space]
-    
-    # Formato: Solo primera letra mayúscula (Sentence case)
-    return final_title.capitalize()
+    return _seo_titles([nombrebase], [region], _resolver_plantilla(plantilla))[0]
 
-def generar_meta_description(row, titulo_limpio, region, varietal, score):
+def generar_meta_description(row, titulo_limpio, region, varietal, score, plantilla='default'):
     """
-    Genera Meta Description (Máx ~155 chars estándar SEO).
+    Genera Meta Description (misma lógica que generar_seo_lote).
     Estrategia: Construcción por oraciones completas para evitar cortes bruscos.
     Formato: Sentence case (Solo primera letra mayúscula).
     """
-    # 1. Limpieza preventiva de datos (evita que salgan listas de tags sucias)
-    titulo = str(titulo_limpio).strip()
-    
-    # Limpiamos region y varietal para que no sean listas largas separadas por comas
-    # Si viene "Mendoza, Argentina, Valle de Uco", nos quedamos solo con lo primero antes de la coma para que sea corto y natural.
-    region_corta = str(region).split(',')[0].strip() if region else "best regions"
-    varietal_corto = str(varietal).split(',')[0].strip() if varietal else "fine wine"
-    
-    try: precio = float(row.get('Variant Price', 0))
-    except: precio = 0
-    
-    score_txt = f"Rated {score} pts." if score else ""
-
-    # 2. Definimos bloques de texto por prioridad (Pesos)
-    # Bloque A: La acción principal (Vital)
-    block_a = f"Shop {titulo}."
-    
-    # Bloque B: Contexto (Región y Tipo) - Le da naturalidad
-    # Ej: "A prestigious Malbec from Mendoza."
-    block_b = f"A prestigious {varietal_corto} from {region_corta}."
-    
-    # Bloque C: Gancho de venta (Cierre)
-    if precio > 0 and precio < 50:
-        block_c = "Best price & fast shipping at Mr D Wine."
-    else:
-        block_c = f"{score_txt} Secure your bottle at Mr D Wine."
-
-    # 3. Ensamblaje inteligente (Evita cortes bruscos)
-    # Límite SEO estándar: 155 caracteres (60 es muy poco para description, es para titles)
-    LIMIT = 155 
-    
-    description = block_a
-    
-    # Intentamos agregar Bloque B (Descripción)
-    if len(description) + len(block_b) + 1 <= LIMIT:
-        description += " " + block_b
-        
-    # Intentamos agregar Bloque C (Cierre)
-    # Limpiamos block_c de espacios extra o puntuación flotante antes de medir
-    block_c = block_c.strip().strip(',').strip()
-    
-    if len(description) + len(block_c) + 1 <= LIMIT:
-        description += " " + block_c
+    tpl = _resolver_plantilla(plantilla)
+    return _seo_descripciones([titulo_limpio], [region], [varietal], [score], [row.get('Variant Price', 0)], tpl)[0]
+
+# --- MOTOR SEO POR LOTES ---
+# Plantillas por tienda/idioma. Una plantilla parcial hereda de 'default'.
+# Todos los campos llegan como texto: {score:>3} funciona, {score:.0f} no.
+# 'title_cta' es texto fijo (sin campos); {{ y }} se escapan igual que en el resto.
+CAMPOS_PLANTILLA_SEO = ('titulo', 'region', 'varietal', 'score', 'score_txt')
+PLANTILLAS_SEO = {
+    'default': {
+        'title_limit': 60,
+        'title_cta': "Best price",
+        'desc_limit': 155,
+        'desc_accion': "Shop {titulo}.",
+        'desc_contexto': "A prestigious {varietal} from {region}.",
+        'desc_cierre_precio': "Best price & fast shipping at Mr D Wine.",
+        'desc_cierre_score': "{score_txt} Secure your bottle at Mr D Wine.",
+        'score_txt': "Rated {score} pts.",
+        'precio_gancho': 50,
+        'region_default': "best regions",
+        'varietal_default': "fine wine",
+    },
+    # Tienda en español: solo cambia los textos, límites y umbral heredan de 'default'
+    'es': {
+        'title_cta': "Mejor precio",
+        'desc_accion': "Compra {titulo}.",
+        'desc_contexto': "Un prestigioso {varietal} de {region}.",
+        'desc_cierre_precio': "Mejor precio y envío rápido en Mr D Wine.",
+        'desc_cierre_score': "{score_txt} Asegura tu botella en Mr D Wine.",
+        'score_txt': "Calificado con {score} pts.",
+        'region_default': "las mejores regiones",
+        'varietal_default': "vino fino",
+    },
+}
 
-    # 4. Formato final
-    # Aseguramos que termine en punto si no lo tiene
-    if not description.endswith('.'):
-        description += "."
-        
-    # Aplicamos Sentence case (Solo primera letra mayúscula)
-    return description.capitalize()
+@functools.lru_cache(maxsize=None)
+def _compilar_plantilla(plantilla):
+    """
+    Convierte "Shop {titulo}." en ("Shop {}.", ('titulo',)) una sola vez,
+    para formatear por posición sin resolver nombres en cada fila.
+    Valida los campos aquí para no fallar a mitad del lote.
+    """
+    fmt = []
+    usados = []
+    try:
+        for literal, campo, spec, conv in string.Formatter().parse(plantilla):
+            fmt.append(literal.replace('{', '{{').replace('}', '}}'))
+            if campo is None: continue
+            if campo not in CAMPOS_PLANTILLA_SEO:
+                raise ValueError(f"campo {{{campo}}} no soportado (válidos: {', '.join(CAMPOS_PLANTILLA_SEO)})")
+            fmt.append('{' + (f'!{conv}' if conv else '') + (f':{spec}' if spec else '') + '}')
+            usados.append(campo)
+        fmt = ''.join(fmt)
+        fmt.format(*[''] * len(usados))
+    except ValueError as e:
+        raise ValueError(f"Plantilla SEO inválida {plantilla!r}: {e}") from None
+    except (KeyError, IndexError):
+        raise ValueError(f"Plantilla SEO inválida {plantilla!r}: no se admiten campos dentro del formato") from None
+    return fmt, tuple(usados)
+
+def _render_columnas(plantilla, campos, n):
+    """Ensambla la plantilla para todas las filas con un solo map de str.format."""
+    fmt, usados = _compilar_plantilla(plantilla)
+    if not usados: return [fmt.format()] * n
+    return list(map(fmt.format, *[campos[c] for c in usados]))
+
+def _precio_float(valor):
+    try: return float(valor)
+    except: return 0
+
+def _resolver_plantilla(plantilla):
+    """Clave de PLANTILLAS_SEO o dict con overrides -> plantilla completa y validada."""
+    if isinstance(plantilla, str):
+        if plantilla not in PLANTILLAS_SEO:
+            raise ValueError(f"Plantilla SEO inválida {plantilla!r}: no existe (disponibles: {', '.join(PLANTILLAS_SEO)})")
+        plantilla = PLANTILLAS_SEO[plantilla]
+    tpl = {**PLANTILLAS_SEO['default'], **plantilla}
+    for clave in ('score_txt', 'desc_accion', 'desc_contexto', 'desc_cierre_precio', 'desc_cierre_score'):
+        _compilar_plantilla(tpl[clave])
+    # El CTA del title es texto fijo: sin campos, pero con el mismo escape de llaves
+    fmt, usados = _compilar_plantilla(tpl['title_cta'])
+    if usados:
+        raise ValueError(f"Plantilla SEO inválida {tpl['title_cta']!r}: 'title_cta' no admite campos")
+    tpl['title_cta'] = fmt.format()
+    return tpl
+
+def _seo_titles(nombres, regiones, tpl):
+    """SEO Title (Límite 60 caracteres): solo se arma el texto final."""
+    limite = tpl['title_limit']
+    cta = " " + tpl['title_cta']
+    seo_titles = []
+    for titulo, region in zip(nombres, regiones):
+        titulo = str(titulo).strip()
+        if region:
+            region = str(region)
+            if len(titulo) + 1 + len(region) <= limite: titulo = f"{titulo} {region}"
+        if len(titulo) + len(cta) <= limite:
+            titulo += cta
+        elif len(titulo) > limite:
+            # Fallback si el nombre solo ya es muy largo
+            titulo = titulo[:limite]
+            last_space = titulo.rfind(' ')
+            if last_space != -1: titulo = titulo[:last_space]
+        seo_titles.append(titulo.capitalize())
+    return seo_titles
+
+def _seo_descripciones(nombres, regiones, varietales, scores, precios, tpl):
+    """Meta Description: cada bloque se formatea en una sola pasada por columna."""
+    titulos = [str(t).strip() for t in nombres]
+    n = len(titulos)
+    campos = {
+        'titulo': titulos,
+        'region': [str(r).split(',')[0].strip() if r else tpl['region_default'] for r in regiones],
+        'varietal': [str(v).split(',')[0].strip() if v else tpl['varietal_default'] for v in varietales],
+        'score': list(map(str, scores)),
+    }
+    campos['score_txt'] = [txt if s else "" for txt, s in zip(_render_columnas(tpl['score_txt'], campos, n), scores)]
+
+    block_a = _render_columnas(tpl['desc_accion'], campos, n)
+    block_b = _render_columnas(tpl['desc_contexto'], campos, n)
+    cierre_precio = _render_columnas(tpl['desc_cierre_precio'], campos, n)
+    cierre_score = _render_columnas(tpl['desc_cierre_score'], campos, n)
+
+    limite = tpl['desc_limit']
+    gancho = tpl['precio_gancho']
+    seo_descs = []
+    for description, b, precio, c_precio, c_score in zip(block_a, block_b, precios, cierre_precio, cierre_score):
+        block_c = (c_precio if 0 < _precio_float(precio) < gancho else c_score).strip().strip(',').strip()
+        if len(description) + len(b) + 1 <= limite: description = f"{description} {b}"
+        if len(description) + len(block_c) + 1 <= limite: description = f"{description} {block_c}"
+        # Aseguramos que termine en punto si no lo tiene
+        if not description.endswith('.'): description += "."
+        seo_descs.append(description.capitalize())
+    return seo_descs
+
+def generar_seo_lote(nombres, regiones, varietales, scores, precios, plantilla='default'):
+    """
+    Genera SEO Title y Meta Description para todos los padres de una vez.
+    Recibe columnas (una posición por padre) y devuelve un DataFrame con
+    'SEO Title' y 'SEO Description'. Reglas: el title nunca incluye el año y
+    se arma hasta 'title_limit' (60); la description por oraciones completas
+    hasta 'desc_limit' (155). Ambos en Sentence case.
+    'plantilla' puede ser una clave de PLANTILLAS_SEO o un dict con overrides.
+    """
+    tpl = _resolver_plantilla(plantilla)
+    regiones = list(regiones)
+    return pd.DataFrame({
+        'SEO Title': _seo_titles(nombres, regiones, tpl),
+        'SEO Description': _seo_descripciones(nombres, regiones, varietales, scores, precios, tpl),
+    })
 
 # --- MOTOR DE LIMPIEZA ---
 def extraer_anio(texto):
@@ -420,7 +487,7 @@ def generar_sabana_actualizacion(df):
     
     return df_clean, "✅ Actualización Generada", log
 
-def procesar_agrupacion_inteligente(df):
+def procesar_agrupacion_inteligente(df, plantilla='default'):
     log = []
     lista_redirecciones = []
     
@@ -448,6 +515,7 @@ def procesar_agrupacion_inteligente(df):
     df['__handle_canonico'] = df.apply(lambda x: limpiar_texto_handle(f"{x['__nombre_base']}"), axis=1)
     
     rows_finales = []
+    padres_seo = []
     
     grupos = df.groupby('__group_key')
     clusters_encontrados = 0
@@ -493,10 +561,8 @@ def procesar_agrupacion_inteligente(df):
                 fila['Score'] = score if score else ''
                 fila['Varietal'] = varietal
                 
-                anio_seo = row['__anio_detectado']
-                seo_title = generar_seo_title(anio_seo, titulo_padre, region, score, es_unico=es_producto_unico)
-                fila['SEO Title'] = seo_title
-                fila['SEO Description'] = generar_meta_description(row, titulo_padre, region, varietal, score)
+                # SEO Title / Description se generan por lotes al final
+                padres_seo.append((fila, titulo_padre, region, varietal, score, row.get('Variant Price', 0)))
                 
                 es_primera_variante = False
             
@@ -565,6 +631,13 @@ def procesar_agrupacion_inteligente(df):
             fila['Variant Inventory Tracker'] = 'shopify'
             rows_finales.append(fila)
     
+    if padres_seo:
+        filas, titulos, regiones, varietales, scores, precios = zip(*padres_seo)
+        seo = generar_seo_lote(titulos, regiones, varietales, scores, precios, plantilla)
+        for fila, seo_title, seo_desc in zip(filas, seo['SEO Title'], seo['SEO Description']):
+            fila['SEO Title'] = seo_title
+            fila['SEO Description'] = seo_desc
+    
     df_final = pd.DataFrame(rows_finales)
     df_final = df_final[COLUMNAS_SALIDA_EXACTAS]
     
@@ -620,6 +693,7 @@ def main_app():
             st.session_state['creacion_data'] = None
             
         f_cre = st.file_uploader("Archivo Nuevos Productos", type=['csv', 'xlsx'], key="cre")
+        plantilla_seo = st.selectbox("Plantilla SEO (tienda / idioma)", list(PLANTILLAS_SEO), key="plantilla_seo")
         
         col_btn1, col_btn2 = st.columns([1, 4])
         with col_btn1:
@@ -630,7 +704,7 @@ def main_app():
                         except: df = pd.read_csv(f_cre, encoding='latin-1')
                     else: df = pd.read_excel(f_cre)
                     
-                    res, logs, redirs, metrics = procesar_agrupacion_inteligente(df)
+                    res, logs, redirs, metrics = procesar_agrupacion_inteligente(df, plantilla_seo)
                     st.session_state['creacion_data'] = {
                         'res': res, 'logs': logs, 'redirs': redirs, 'metrics': metrics
                     }
@@ -0,0 +1,141 @@
+import os
+import random
+import sys
+
+import pytest
+
+pytest.importorskip("streamlit")
+pd = pytest.importorskip("pandas")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import app  # noqa: E402
+
+
+# --- Implementación fila a fila original (referencia de paridad) ---
+def _title_original(nombrebase, region):
+    final_title = nombrebase.strip()
+    components = [str(region)] if region else []
+    components.append("Best price")
+    for comp in components:
+        test_title = f"{final_title} {comp}"
+        if len(test_title) <= 60:
+            final_title = test_title
+    if len(final_title) > 60:
+        final_title = final_title[:60]
+        last_space = final_title.rfind(' ')
+        if last_space != -1:
+            final_title = final_title[:last_space]
+    return final_title.capitalize()
+
+
+def _description_original(precio_raw, titulo_limpio, region, varietal, score):
+    titulo = str(titulo_limpio).strip()
+    region_corta = str(region).split(',')[0].strip() if region else "best regions"
+    varietal_corto = str(varietal).split(',')[0].strip() if varietal else "fine wine"
+    try: precio = float(precio_raw)
+    except: precio = 0
+    score_txt = f"Rated {score} pts." if score else ""
+    block_a = f"Shop {titulo}."
+    block_b = f"A prestigious {varietal_corto} from {region_corta}."
+    if precio > 0 and precio < 50:
+        block_c = "Best price & fast shipping at Mr D Wine."
+    else:
+        block_c = f"{score_txt} Secure your bottle at Mr D Wine."
+    description = block_a
+    if len(description) + len(block_b) + 1 <= 155:
+        description += " " + block_b
+    block_c = block_c.strip().strip(',').strip()
+    if len(description) + len(block_c) + 1 <= 155:
+        description += " " + block_c
+    if not description.endswith('.'):
+        description += "."
+    return description.capitalize()
+
+
+PALABRAS = ['chateau', 'opus one', 'x' * 30, 'rioja, spain', '', 'très', 'a' * 70, 'ÉLAN', 'b c']
+PRECIOS = [None, float('nan'), '', 'abc', 0, 12, '49.99', '50', 120, ' 20 ', '1_000', 'inf', -3]
+
+
+def _texto(rng, k):
+    return ' '.join(rng.choice(PALABRAS) for _ in range(rng.randint(0, k)))
+
+
+def test_lote_coincide_con_implementacion_original():
+    rng = random.Random(26)
+    n = 2000
+    nombres = [_texto(rng, 8) for _ in range(n)]
+    regiones = [rng.choice(['', None, 'Napa', 'Mendoza, Argentina, Uco', ', x', _texto(rng, 4)]) for _ in range(n)]
+    varietales = [rng.choice(['', None, 'malbec', 'fine wine', _texto(rng, 3)]) for _ in range(n)]
+    scores = [rng.choice([None, 0, 88, 95, 100]) for _ in range(n)]
+    precios = [rng.choice(PRECIOS) for _ in range(n)]
+
+    seo = app.generar_seo_lote(nombres, regiones, varietales, scores, precios)
+
+    assert seo['SEO Title'].tolist() == [_title_original(*x) for x in zip(nombres, regiones)]
+    assert seo['SEO Description'].tolist() == [
+        _description_original(p, t, r, v, s) for t, r, v, s, p in zip(nombres, regiones, varietales, scores, precios)
+    ]
+
+
+@pytest.mark.parametrize("precio", PRECIOS)
+def test_funciones_fila_usan_el_lote(precio):
+    row = pd.Series({'Variant Price': precio})
+    assert app.generar_seo_title('2019', 'opus one', 'Napa', 95) == _title_original('opus one', 'Napa')
+    assert app.generar_meta_description(row, 'opus one', 'Napa, CA', 'cabernet', 95) == \
+        _description_original(precio, 'opus one', 'Napa, CA', 'cabernet', 95)
+
+
+def test_lote_vacio():
+    seo = app.generar_seo_lote([], [], [], [], [])
+    assert seo.empty
+    assert list(seo.columns) == ['SEO Title', 'SEO Description']
+
+
+def test_plantilla_override_parcial_y_llaves_literales():
+    plantilla = {'title_cta': "Mejor precio", 'desc_cierre_precio': "Use code {{SAVE}}"}
+    seo = app.generar_seo_lote(['opus one'], ['Napa'], ['cabernet'], [95], [20], plantilla)
+    assert seo['SEO Title'].iloc[0] == "Opus one napa mejor precio"
+    assert seo['SEO Description'].iloc[0] == "Shop opus one. a prestigious cabernet from napa. use code {save}."
+
+
+@pytest.mark.parametrize("plantilla", ['{region[0]}', '{titulo.upper}', '{}', '{0}', '{precio}', '{score:.0f}', 'x }'])
+def test_plantilla_invalida(plantilla):
+    with pytest.raises(ValueError, match="Plantilla SEO inválida"):
+        app.generar_seo_lote(['opus one'], [''], [''], [None], [0], {'desc_accion': plantilla})
+
+
+@pytest.mark.parametrize("plantilla", ['no-existe', {'title_cta': "Mejor {precio}"}, {'title_cta': "Mejor {titulo}"}])
+def test_plantilla_invalida_clave_o_cta(plantilla):
+    with pytest.raises(ValueError, match="Plantilla SEO inválida"):
+        app.generar_seo_lote(['opus one'], [''], [''], [None], [0], plantilla)
+
+
+def test_title_cta_con_llaves_literales():
+    seo = app.generar_seo_lote(['opus one'], [''], [''], [None], [0], {'title_cta': "Code {{VIP}}"})
+    assert seo['SEO Title'].iloc[0] == "Opus one code {vip}"
+
+
+def test_agrupacion_con_cabeceras_de_precio_duplicadas():
+    # 'Price' y 'Costo' se normalizan ambas a 'Variant Price': el precio se toma como 0
+    df = pd.DataFrame({
+        'Title': ['Opus One 2019', 'Opus One 2018', 'Caymus 2020'],
+        'Vendor': ['Opus', 'Opus', 'Caymus'],
+        'Price': [20, 25, 30],
+        'Costo': [10, 12, 15],
+    })
+    res = app.procesar_agrupacion_inteligente(df)[0]
+    padres = res[res['SEO Description'] != '']
+    assert len(padres) == 2
+    for _, fila in padres.iterrows():
+        assert fila['SEO Description'] == _description_original(0, fila['Title'], 'Region', 'fine wine', None)
+
+
+def test_agrupacion_con_plantilla_es():
+    df = pd.DataFrame({'Title': ['Catena Malbec 2019'], 'Vendor': ['Catena'], 'Tags': ['Mendoza, Argentina'],
+                       'Body (HTML)': ['<p>95 Pts</p>'], 'Variant Price': [120]})
+    fila = app.procesar_agrupacion_inteligente(df, 'es')[0].iloc[0]
+    assert fila['SEO Title'] == "Catena malbec mendoza, argentina mejor precio"
+    assert fila['SEO Description'] == (
+        "Compra catena malbec. un prestigioso malbec de mendoza. "
+        "calificado con 95 pts. asegura tu botella en mr d wine."
+    )